@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""测试共用的夹具：加载 1.py (不创建窗口、不导入 tkinter) 并在临时目录中创建 git 仓库"""
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '1.py')
+GIT_ENV = {
+    'GIT_AUTHOR_NAME': 'test', 'GIT_AUTHOR_EMAIL': 'test@example.com',
+    'GIT_COMMITTER_NAME': 'test', 'GIT_COMMITTER_EMAIL': 'test@example.com',
+    'GIT_CONFIG_NOSYSTEM': '1', 'GIT_CONFIG_GLOBAL': os.devnull,
+}
+
+if shutil.which('git') is None:
+    pytest.skip("需要 git", allow_module_level=True)
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """以模块方式加载 1.py；应用数据目录指向临时目录，不写入用户主目录"""
+    home = tmp_path_factory.mktemp('home')
+    os.environ['HOME'] = str(home)
+    os.environ['USERPROFILE'] = str(home)
+    os.environ.update(GIT_ENV)
+    spec = importlib.util.spec_from_file_location('simple_git_app', APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['simple_git_app'] = module
+    spec.loader.exec_module(module)
+    yield module
+    module.ObjectStore.close_all()
+
+
+class Repo:
+    """临时 git 仓库及常用操作"""
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def git(self, *args, check=True):
+        result = subprocess.run(['git', *args], cwd=self.path, capture_output=True,
+                                env=dict(os.environ, **GIT_ENV))
+        if check and result.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)} 失败: {result.stderr.decode('utf-8', 'replace')}")
+        return result.stdout.decode('utf-8', 'surrogateescape')
+
+    def write(self, name, content, mode=None):
+        full = os.path.join(self.path, *name.split('/'))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'wb') as f:
+            f.write(content.encode('utf-8') if isinstance(content, str) else content)
+        if mode is not None:
+            os.chmod(full, mode)
+        return full
+
+    def commit(self, message='commit', *paths):
+        self.git('add', *(paths or ('-A',)))
+        self.git('commit', '-q', '--allow-empty', '-m', message)
+        return self.git('rev-parse', 'HEAD').strip()
+
+    @property
+    def git_dir(self):
+        return os.path.join(self.path, '.git')
+
+
+@pytest.fixture
+def repo(app, tmp_path):
+    path = tmp_path / 'repo'
+    path.mkdir()
+    r = Repo(path)
+    r.git('init', '-q')
+    r.git('checkout', '-q', '-b', 'main')
+    return r
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""BatchRunner：脚本校验与在临时仓库中执行步骤"""
+import json
+
+import pytest
+
+
+@pytest.mark.parametrize('script, message', [
+    ({'repos': 'a'}, "repos"),
+    ({'repos': [1]}, "repos"),
+    ({'repos': ['a'], 'steps': {'op': 'status'}}, "steps"),
+    ({'repos': ['a'], 'steps': ['status']}, "每个步骤"),
+    ({'repos': ['a'], 'steps': [{'op': 'rebase'}]}, "未知操作"),
+    ({'repos': ['a'], 'steps': [{'op': 'branch_delete'}]}, "name"),
+    ({'repos': ['a'], 'steps': [{'op': 'commit', 'message': 42}]}, "message"),
+    ({'repos': ['a'], 'steps': [{'op': 'commit', 'message': 'm', 'allow_empty': 'yes'}]}, "allow_empty"),
+    ({'repos': ['a'], 'steps': [{'op': 'branch_create', 'name': 'x', 'start': ['HEAD']}]}, "start"),
+    ({'repos': ['a'], 'steps': [{'op': 'fetch', 'timeout': '60'}]}, "timeout"),
+    ({'repos': ['a'], 'steps': [{'op': 'push', 'timeout': True}]}, "timeout"),
+    ({'repos': ['a'], 'steps': [{'op': 'push', 'timeout': 0}]}, "timeout"),
+    ({'repos': ['a'], 'steps': [{'op': 'status', 'untracked': 'some'}]}, "untracked"),
+    ({'repos': ['a'], 'steps': [{'op': 'stage', 'patterns': [1, 2]}]}, "patterns"),
+    ({'repos': ['a'], 'steps': [{'op': 'push', 'remotes': {'origin': 1}}]}, "remotes"),
+    ({'repos': ['a'], 'jobs': '4'}, "jobs"),
+    ({'repos': ['a'], 'stop_on_error': 'no'}, "stop_on_error"),
+])
+def test_invalid_scripts_rejected_before_running(app, script, message):
+    with pytest.raises(ValueError, match=message):
+        app.BatchRunner(script)._repo_jobs()
+
+
+def test_scalar_patterns_are_wrapped(app):
+    assert app.BatchRunner._string_list('*.py', 'patterns') == ['*.py']
+    assert app.BatchRunner._string_list(['a', 'b'], 'patterns') == ['a', 'b']
+
+
+def test_per_repo_steps_override_defaults(app, tmp_path):
+    script = {'repos': [str(tmp_path / 'a'), {'path': str(tmp_path / 'b'), 'steps': [{'op': 'fetch'}]}],
+              'steps': [{'op': 'status'}]}
+    jobs = app.BatchRunner(script)._repo_jobs()
+    assert [[s['op'] for s in steps] for _, steps in jobs] == [['status'], ['fetch']]
+
+
+def test_run_stage_commit_and_branches(app, repo):
+    repo.write('a.txt', 'a\n')
+    repo.commit('base')
+    repo.write('a.txt', 'b\n')
+    repo.write('src/x.py', 'x\n')
+    script = {'repos': [repo.path], 'steps': [
+        {'op': 'status'},
+        {'op': 'stage', 'patterns': '*.py'},
+        {'op': 'commit', 'message': 'only python'},
+        {'op': 'commit', 'message': 'nothing staged'},
+        {'op': 'branch_create', 'name': 'feature/x'},
+        {'op': 'branch_delete', 'name': 'feature/x'},
+    ]}
+    report = app.BatchRunner(script, jobs=1).run()
+    assert report['ok'], json.dumps(report, ensure_ascii=False)
+    steps = report['repos'][0]['steps']
+    assert steps[0]['entries'] == 2
+    assert steps[3].get('skipped')
+    assert repo.git('log', '-1', '--format=%s').strip() == 'only python'
+    assert repo.git('status', '--porcelain').strip() == 'M a.txt'
+    assert not repo.git('branch', '--list', 'feature/x').strip()
+
+
+def test_failed_step_skips_rest_of_repo(app, repo, tmp_path):
+    repo.commit('base')
+    script = {'repos': [repo.path, str(tmp_path / 'missing')], 'steps': [
+        {'op': 'branch_delete', 'name': 'does-not-exist'},
+        {'op': 'status'},
+    ]}
+    report = app.BatchRunner(script, jobs=2).run()
+    assert not report['ok']
+    first, missing = report['repos']
+    assert not first['steps'][0]['ok'] and first['steps'][1] == {'op': 'status', 'skipped': True}
+    assert missing['error']
+
+
+def test_unexpected_step_error_becomes_failed_step(app, repo, monkeypatch):
+    repo.commit('base')
+
+    def boom(self, repo_path, step):
+        raise TypeError("unexpected")
+
+    monkeypatch.setattr(app.BatchRunner, '_op_status', boom)
+    report = app.BatchRunner({'repos': [repo.path], 'steps': [{'op': 'status'}]}).run()
+    step = report['repos'][0]['steps'][0]
+    assert not step['ok'] and 'unexpected' in step['stderr']
+
+
+def test_run_batch_reports_invalid_script(app, tmp_path, capsys):
+    script = tmp_path / 'bad.json'
+    script.write_text(json.dumps({'repos': ['a'], 'steps': [{'op': 'commit', 'message': 1}]}), encoding='utf-8')
+    assert app.run_batch(['--batch', str(script)]) == 2
+    report = json.loads(capsys.readouterr().out)
+    assert not report['ok'] and 'message' in report['error']
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""GitIndex：原生读取 .git/index 的结果与 git ls-files / git diff 比较"""
+import os
+import subprocess
+import time
+
+import pytest
+
+HAS_SYMLINK = hasattr(os, 'symlink') and os.name != 'nt'
+
+
+def make_base(repo):
+    """普通文件、可执行文件、子目录、符号链接，各提交一次"""
+    repo.write('a.txt', 'alpha\n')
+    repo.write('b-c.txt', 'sorts before b/\n')
+    repo.write('b/inner.txt', 'inner\n')
+    repo.write('b/deep/x.py', 'print(1)\n')
+    repo.write('run.sh', '#!/bin/sh\necho hi\n', mode=0o755)
+    if HAS_SYMLINK:
+        os.symlink('a.txt', os.path.join(repo.path, 'link'))
+    repo.commit('base')
+    # 把工作区文件的修改时间调早再刷新索引，避免所有条目都处于 "racy" 状态
+    past = time.time() - 10
+    for root, dirs, files in os.walk(repo.path):
+        dirs[:] = [d for d in dirs if d != '.git']
+        for name in files:
+            os.utime(os.path.join(root, name), (past, past), follow_symlinks=False)
+    repo.git('update-index', '--refresh', check=False)
+
+
+def ls_files(repo):
+    """git ls-files -s 的 (模式, 对象ID, stage, 路径) 列表"""
+    entries = []
+    for line in repo.git('ls-files', '-s', '-z').split('\0'):
+        if line:
+            meta, path = line.split('\t', 1)
+            mode, oid, stage = meta.split()
+            entries.append((int(mode, 8), oid, int(stage), path))
+    return entries
+
+
+def native_entries(index):
+    return [(index.mode[i], index.oid(i), index.stage(i), path) for i, path in enumerate(index.paths)]
+
+
+@pytest.mark.parametrize('version', [2, 3, 4])
+def test_index_versions_match_ls_files(app, repo, version):
+    make_base(repo)
+    repo.write('new/dir/deeper/n.txt', 'n\n')
+    repo.write('new/dir/other.txt', 'o\n')
+    repo.git('add', 'new')
+    if version == 3:
+        # 没有扩展 flags 时 git 会把版本 3 写成版本 2
+        repo.write('ita.txt', 'ita\n')
+        repo.git('add', '-N', 'ita.txt')
+    repo.git('update-index', '--index-version', str(version))
+    index = app.GitIndex.read(repo.git_dir)
+    assert index.version == version
+    assert index.unsupported is None
+    assert native_entries(index) == ls_files(repo)
+
+
+def test_extended_flags(app, repo):
+    make_base(repo)
+    repo.write('ita.txt', 'ita\n')
+    repo.git('add', '-N', 'ita.txt')
+    repo.git('update-index', '--skip-worktree', 'b-c.txt')
+    index = app.GitIndex.read(repo.git_dir)
+    assert index.version == 3
+    assert native_entries(index) == ls_files(repo)
+    ita, skip = index.find('ita.txt'), index.find('b-c.txt')
+    assert index.ext_flags[ita] & app.GitIndex.EXT_INTENT_TO_ADD
+    assert index.ext_flags[skip] & app.GitIndex.EXT_SKIP_WORKTREE
+    # skip-worktree 的文件即使从工作区删除也不算修改
+    os.remove(os.path.join(repo.path, 'b-c.txt'))
+    changes, exact = index.compare_worktree(repo.path)
+    assert exact and changes == [('ita.txt', 'M')]
+
+
+def test_split_index_is_unsupported(app, repo):
+    make_base(repo)
+    repo.git('update-index', '--split-index')
+    repo.write('a.txt', 'changed\n')
+    repo.git('add', 'a.txt')
+    index = app.GitIndex.read(repo.git_dir)
+    assert index.unsupported
+    assert app.index_worktree_dirty(repo.path) is None
+    assert app.index_has_staged_changes(repo.path) is None
+    # 回退到 git 后结果仍然正确
+    assert app.uncommitted_changes(repo.path) == (False, True)
+
+
+def test_unmerged_entries(app, repo):
+    make_base(repo)
+    conflict(repo)
+    index = app.GitIndex.read(repo.git_dir)
+    assert index.has_unmerged
+    assert native_entries(index) == ls_files(repo)
+    assert index.find('a.txt') is None
+
+
+def test_path_replaced_by_directory_is_deleted(app, repo):
+    make_base(repo)
+    os.remove(os.path.join(repo.path, 'a.txt'))
+    os.mkdir(os.path.join(repo.path, 'a.txt'))
+    index = app.GitIndex.read(repo.git_dir)
+    changes, exact = index.compare_worktree(repo.path)
+    assert exact and changes == [('a.txt', 'D')]
+
+
+def conflict(repo):
+    repo.git('checkout', '-q', '-b', 'other')
+    repo.write('a.txt', 'other\n')
+    repo.commit('other')
+    repo.git('checkout', '-q', 'main')
+    repo.write('a.txt', 'mine\n')
+    repo.commit('mine')
+    repo.git('merge', '-q', 'other', check=False)
+
+
+def swap_symlink(repo):
+    path = os.path.join(repo.path, 'link')
+    os.remove(path)
+    repo.write('link', 'a.txt')     # 内容与符号链接目标相同，只有文件类型不同
+
+
+def staged_then_reverted(repo):
+    repo.write('a.txt', 'tmp\n')
+    repo.git('add', 'a.txt')
+    repo.write('a.txt', 'alpha\n')
+    repo.git('add', 'a.txt')
+
+
+SCENARIOS = {
+    "干净": lambda r: None,
+    "只更新修改时间": lambda r: os.utime(os.path.join(r.path, 'a.txt')),
+    "修改内容 (大小不变)": lambda r: r.write('a.txt', 'ALPHA\n'),
+    "修改子目录文件": lambda r: r.write('b/deep/x.py', 'print(2)\n'),
+    "chmod +x": lambda r: os.chmod(os.path.join(r.path, 'a.txt'), 0o755),
+    "chmod -x": lambda r: os.chmod(os.path.join(r.path, 'run.sh'), 0o644),
+    "core.filemode=false 时 chmod +x": lambda r: (r.git('config', 'core.filemode', 'false'),
+                                                 os.chmod(os.path.join(r.path, 'a.txt'), 0o755)),
+    "符号链接改为同内容普通文件": swap_symlink,
+    "删除文件": lambda r: os.remove(os.path.join(r.path, 'b', 'inner.txt')),
+    "暂存修改": lambda r: (r.write('a.txt', 'staged\n'), r.git('add', 'a.txt')),
+    "暂存后工作区改回": lambda r: (r.write('a.txt', 'staged\n'), r.git('add', 'a.txt'), r.write('a.txt', 'alpha\n')),
+    "暂存可执行位": lambda r: r.git('update-index', '--chmod=+x', 'a.txt'),
+    "暂存新文件": lambda r: (r.write('new/dir/n.txt', 'n\n'), r.git('add', 'new')),
+    "暂存删除": lambda r: r.git('rm', '-q', '--cached', 'b-c.txt'),
+    "add 后再还原暂存 (树扩展失效但无变化)": staged_then_reverted,
+    "intent-to-add": lambda r: (r.write('ita.txt', 'ita\n'), r.git('add', '-N', 'ita.txt')),
+    "合并冲突": conflict,
+}
+
+
+@pytest.mark.parametrize('name', list(SCENARIOS))
+def test_native_checks_match_git_diff(app, repo, name):
+    """原生检查与 git diff --quiet / --name-only / --cached --quiet 一致 (None 表示交给 git，也可接受)"""
+    if '符号链接' in name and not HAS_SYMLINK:
+        pytest.skip("需要符号链接")
+    make_base(repo)
+    SCENARIOS[name](repo)
+    # 先做原生检查：git diff 可能刷新索引中的 stat 信息
+    preview = app.index_preliminary_status(repo.path)
+    got = {
+        'dirty': app.index_worktree_dirty(repo.path),
+        'paths': None if preview is None else sorted({line[3:] for line in preview}),
+        'staged': app.index_has_staged_changes(repo.path),
+    }
+    want = {
+        'dirty': diff_exit(repo, '--quiet'),
+        'paths': sorted(set(repo.git('diff', '--name-only').split())),
+        'staged': diff_exit(repo, '--cached', '--quiet'),
+    }
+    for key in ('dirty', 'paths', 'staged'):
+        assert got[key] is None or got[key] == want[key], key
+
+
+def diff_exit(repo, *args):
+    return subprocess.run(['git', 'diff', *args], cwd=repo.path, capture_output=True).returncode != 0
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""MetadataCache：有效性标记在读取数据之前取得"""
+import os
+
+
+def test_change_during_read_marks_entry_stale(app, repo, tmp_path):
+    repo.write('a.txt', 'a\n')
+    repo.commit('one')
+    cache = app.MetadataCache(str(tmp_path / 'cache.json'))
+    stamp = cache.compute_stamp(repo.path)
+    # 读取期间仓库发生变化 (例如另一个进程提交)
+    repo.write('a.txt', 'b\n')
+    repo.commit('two')
+    cache.put(repo.path, stamp, status=[])
+    entry, fresh = cache.get(repo.path)
+    assert entry['status'] == [] and not fresh
+
+    cache.put(repo.path, cache.compute_stamp(repo.path), status=[])
+    assert cache.get(repo.path)[1]
+
+
+def test_save_and_reload(app, repo, tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = app.MetadataCache(path)
+    cache.put(repo.path, cache.compute_stamp(repo.path), remotes=['origin'])
+    cache.save()
+    assert os.path.exists(path)
+    entry, _ = app.MetadataCache(path).get(repo.path)
+    assert entry['remotes'] == ['origin']
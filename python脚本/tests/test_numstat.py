@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""NumstatCache：numstat 输出解析与分批计算，结果与 git diff --numstat 比较"""
+import pytest
+
+
+def test_parse_numstat_plain_binary_and_rename(app):
+    binary = app.NumstatCache.BINARY
+    stdout = ("3\t1\ta.txt\0"
+              "-\t-\timg.png\0"
+              "5\t0\t\0old name.txt\0new\tname.txt\0"
+              "0\t2\t中文/路径.md\0")
+    assert app.NumstatCache.parse_numstat(stdout) == {
+        'a.txt': (3, 1), 'img.png': binary, 'new\tname.txt': (5, 0), '中文/路径.md': (0, 2)}
+
+
+@pytest.mark.parametrize('stdout', ['', '\0', 'garbage\0', '1\t2\t\0only-old\0', 'x\ty\tpath\0'])
+def test_parse_numstat_ignores_malformed_records(app, stdout):
+    assert app.NumstatCache.parse_numstat(stdout) == {}
+
+
+def test_compute_matches_git_and_uses_cache(app, repo, monkeypatch):
+    repo.write('a.txt', ''.join(f"{i}\n" for i in range(10)))
+    repo.write('bin.dat', b'\0\1\2' * 10)
+    repo.write('staged.txt', 'one\n')
+    repo.commit('base')
+    repo.write('a.txt', ''.join(f"{i}\n" for i in range(3, 12)))
+    repo.write('bin.dat', b'\0\3' * 10)
+    repo.write('staged.txt', 'one\ntwo\nthree\n')
+    repo.git('add', 'staged.txt')
+    repo.write('new.txt', 'x\ny\nz')
+    cache = app.NumstatCache()
+    requests = [('a.txt', False, ' M'), ('bin.dat', False, ' M'), ('staged.txt', True, 'M '), ('new.txt', False, '??')]
+    results = cache.compute(repo.path, requests)
+    expected = app.NumstatCache.parse_numstat(repo.git('diff', '--numstat', '-z'))
+    assert results[('a.txt', False)] == expected['a.txt'] == (2, 3)
+    assert results[('bin.dat', False)] == app.NumstatCache.BINARY
+    assert results[('staged.txt', True)] == (2, 0)
+    assert results[('new.txt', False)] == (3, 0)
+
+    # 文件没有变化时直接命中缓存，不再启动 git
+    monkeypatch.setattr(app, 'run_git', lambda *args, **kwargs: pytest.fail("不应再次调用 git"))
+    assert cache.compute(repo.path, requests) == results
+
+
+def test_huge_files_are_not_read(app, repo, monkeypatch):
+    monkeypatch.setattr(app.NumstatCache, 'HUGE_FILE_BYTES', 100)
+    repo.write('big.txt', 'x\n' * 10)
+    repo.commit('base')
+    repo.write('big.txt', 'y\n' * 100)
+    results = app.NumstatCache().compute(repo.path, [('big.txt', False, ' M')])
+    assert results[('big.txt', False)] == app.NumstatCache.HUGE
+    assert app.NumstatCache.format(app.NumstatCache.HUGE) == "[大文件]"
+    assert app.NumstatCache.format((4, 2)) == "(+4 -2)"
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""ObjectStore：松散对象、packfile (含 OFS/REF delta) 读取与提交遍历，结果与 git 本身比较"""
+import os
+import zlib
+
+import pytest
+
+
+def cat_file(repo, oid):
+    obj_type = repo.git('cat-file', '-t', oid).strip()
+    import subprocess
+    data = subprocess.run(['git', 'cat-file', obj_type, oid], cwd=repo.path, capture_output=True).stdout
+    return obj_type, data
+
+
+def make_history(repo, versions=20):
+    """同一个文件反复小幅修改，gc 后会产生 delta 链"""
+    lines = [f"line {i}\n" for i in range(200)]
+    oids = []
+    for n in range(versions):
+        lines[n * 7 % 200] = f"changed in version {n}\n"
+        repo.write('big.txt', ''.join(lines))
+        repo.write(f'dir/file{n % 3}.txt', f"v{n}\n")
+        oids.append(repo.commit(f"version {n}"))
+    return oids
+
+
+def all_objects(repo):
+    out = repo.git('cat-file', '--batch-all-objects', '--batch-check=%(objectname)')
+    return out.split()
+
+
+def test_loose_objects_match_cat_file(app, repo):
+    make_history(repo, 3)
+    store = app.ObjectStore(repo.git_dir, repo.path)
+    try:
+        for oid in all_objects(repo):
+            assert store.read(oid, allow_fallback=False) == cat_file(repo, oid)
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize('gc_args', [(), ('--aggressive',)])
+def test_packed_objects_with_deltas_match_cat_file(app, repo, gc_args):
+    make_history(repo, 20)
+    repo.git('gc', '-q', *gc_args)
+    assert not [d for d in os.listdir(os.path.join(repo.git_dir, 'objects')) if len(d) == 2]
+    store = app.ObjectStore(repo.git_dir, repo.path)
+    try:
+        for oid in all_objects(repo):
+            assert store.read(oid, allow_fallback=False) == cat_file(repo, oid)
+    finally:
+        store.close()
+
+
+def test_ref_delta_thin_pack(app, repo, tmp_path):
+    """fetch 得到的 pack 不做 gc 时可能包含 REF_DELTA"""
+    make_history(repo, 10)
+    clone = tmp_path / 'clone'
+    repo.git('clone', '-q', '--no-local', repo.path, str(clone))
+    git_dir = os.path.join(str(clone), '.git')
+    store = app.ObjectStore(git_dir, str(clone))
+    try:
+        for oid in all_objects(repo):
+            assert store.read(oid, allow_fallback=False) == cat_file(repo, oid)
+    finally:
+        store.close()
+
+
+def test_iter_commits_matches_rev_list(app, repo):
+    oids = make_history(repo, 12)
+    repo.git('checkout', '-q', '-b', 'side', oids[4])
+    repo.write('side.txt', 'side\n')
+    side = repo.commit('side')
+    repo.git('checkout', '-q', 'main')
+    repo.git('merge', '-q', '--no-ff', '-m', 'merge side', side)
+    repo.git('gc', '-q')
+    head = repo.git('rev-parse', 'HEAD').strip()
+    store = app.ObjectStore(repo.git_dir, repo.path)
+    try:
+        walked = [c['oid'] for c in store.iter_commits(head, 1000)]
+    finally:
+        store.close()
+    expected = repo.git('rev-list', '--date-order', 'HEAD').split()
+    assert sorted(walked) == sorted(expected)
+    assert walked[0] == head
+
+
+def test_parse_commit(app):
+    data = (b"tree " + b"a" * 40 + b"\nparent " + b"b" * 40 + b"\n"
+            b"author Some One <one@example.com> 1700000000 +0800\n"
+            b"committer Other <o@example.com> 1700000100 +0000\n\nSummary line\n\nbody\n")
+    commit = app.parse_commit('c' * 40, data)
+    assert commit['tree'] == 'a' * 40
+    assert commit['parents'] == ['b' * 40]
+    assert commit['author'] == 'Some One'
+    assert (commit['author_time'], commit['commit_time']) == (1700000000, 1700000100)
+    assert commit['summary'] == 'Summary line'
+
+
+def varint(n):
+    out = bytearray()
+    while True:
+        out.append((n & 0x7f) | (0x80 if n > 0x7f else 0))
+        n >>= 7
+        if not n:
+            return bytes(out)
+
+
+def test_apply_delta_copy_and_insert(app):
+    base = b"0123456789" * 10
+    # 复制 base[10:15]，插入 "abc"，再复制 base[0:3]
+    delta = (varint(len(base)) + varint(11)
+             + bytes([0x80 | 0x01 | 0x10, 10, 5]) + bytes([3]) + b"abc" + bytes([0x80 | 0x10, 3]))
+    assert app.apply_delta(base, delta) == b"01234abc012"
+
+
+def test_apply_delta_copy_size_zero_means_64k(app):
+    base = bytes(range(256)) * 300
+    delta = varint(len(base)) + varint(0x10000) + bytes([0x80 | 0x01, 0])   # 偏移 0，没有大小字节
+    assert app.apply_delta(base, delta) == base[:0x10000]
+
+
+@pytest.mark.parametrize('delta', [
+    varint(5) + varint(1) + b"\x01x",         # 基础对象大小不符
+    varint(10) + varint(1) + b"\x00",         # 保留的 0 指令
+    varint(10) + varint(5) + b"\x01x",        # 结果大小不符
+])
+def test_apply_delta_rejects_invalid(app, delta):
+    with pytest.raises(ValueError):
+        app.apply_delta(b"0123456789", delta)
+
+
+def test_index_v4_varint(app):
+    # git 的 offset 编码: 每多一个字节先加 1 再左移 7 位
+    assert app._read_index_varint(b"\x05", 0) == (5, 1)
+    assert app._read_index_varint(b"\x80\x00", 0) == (128, 2)
+    assert app._read_index_varint(b"\xff\x7f", 0) == (16383 + 128, 2)
+
+
+def test_corrupt_loose_object_raises_value_error(app, repo):
+    repo.write('a.txt', 'hello\n')
+    repo.commit('one')
+    blob = repo.git('rev-parse', 'HEAD:a.txt').strip()
+    path = os.path.join(repo.git_dir, 'objects', blob[:2], blob[2:])
+    os.chmod(path, 0o644)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:len(data) // 2])     # 截断的 zlib 数据
+    store = app.ObjectStore(repo.git_dir, repo.path)
+    try:
+        with pytest.raises(ValueError):
+            store.read(blob, allow_fallback=False)
+        # 允许回退时交给 git cat-file (它同样读不出来)，不抛出 zlib.error
+        assert store.read(blob) is None
+    finally:
+        store.close()
+    with pytest.raises(zlib.error):
+        zlib.decompress(data[:len(data) // 2])
+
+
+def test_release_drops_shared_instance(app, repo):
+    repo.write('a.txt', 'x\n')
+    repo.commit('one')
+    repo.git('gc', '-q')
+    store = app.ObjectStore.for_git_dir(repo.git_dir, repo.path)
+    assert store.packs
+    app.ObjectStore.release(repo.git_dir)
+    assert not store.packs
+    assert app.ObjectStore.for_git_dir(repo.git_dir, repo.path) is not store
+    app.ObjectStore.release(repo.git_dir)